@@ -7,9 +7,9 @@
 # 环境说明：(使用须知！！！！！！很重要，必看！！！！！）
 # 1. 运行依赖：需安装 Python 3.6 及以上版本（推荐 3.8+，兼容性更优）
 # 2. 必要库：需提前安装处理Word和Excel的专用库，安装命令：
-#    pip install python-docx pywin32
+#    pip install python-docx pywin32 openpyxl
 #    若安装速度慢，可使用清华大学镜像：
-#    pip install python-docx pywin32 -i https://pypi.tuna.tsinghua.edu.cn/simple
+#    pip install python-docx pywin32 openpyxl -i https://pypi.tuna.tsinghua.edu.cn/simple
 # 3. 系统兼容性：仅支持 Windows 系统（依赖 pywin32 操作Excel COM接口），文件路径需按Windows格式填写：
 #    - 示例：D:\pycharm\存放docx专用\2025-046111\报告.docx、C:\Users\用户名\Desktop\数据.xlsx
 # 4. 注意事项：
@@ -23,31 +23,52 @@
 
 
 # 导入必要库：上下文管理、正则、系统操作、时间、文件操作、日期处理、类型提示、路径处理、Excel/Word操作
+import bisect
+from collections import defaultdict
 from contextlib import contextmanager
+from functools import lru_cache
+import gc
+import logging
+import queue
 import re
 import sys
+import threading
 import time
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import Optional, List, Tuple, Iterable, Union
 from re import Match as ReMatch
 from pathlib import Path
 import os
+import pythoncom  # COM运行时工具（长跑时释放未使用的COM库）
 import win32com.client as win32  # 用于操作Excel COM接口（Windows专属）
+from openpyxl import load_workbook  # 只读解析外部数据Excel（不启动Excel进程）
 from docx import Document  # 用于解析Word文档
+from docx.oxml.ns import qn  # Word XML命名空间工具（低层遍历表格用）
 
 # made by lck, an intern of this company in 2025 summer
 
 # ------------------- 控制台心跳/进度条 -------------------
+# 状态输出统一走logging：时间戳由格式器生成，写stdout与进度条/输入提示同流不乱序；
+# DEBUG级默认关闭，热路径里的log.debug只剩一次isEnabledFor判断
+logging.basicConfig(level=logging.INFO, stream=sys.stdout,
+                    format="[%(asctime)s] %(message)s", datefmt="%H:%M:%S")
+log = logging.getLogger("探伤填表")
+
+
 def print_step(msg: str) -> None:
-    """打印带时间戳的步骤信息，用于跟踪程序执行进度"""
-    now = time.strftime("%H:%M:%S")  # 格式化当前时间为时分秒
-    print(f"[{now}] {msg}", flush=True)  # 强制刷新输出，确保实时显示
+    """输出带时间戳的步骤信息，用于跟踪程序执行进度"""
+    log.info(msg)
+
+
+_PROGRESS_MIN_INTERVAL = 0.2  # 进度条最小刷新间隔（秒）：中间帧节流，终端写入不再随行数线性增长
+_progress_last_ts: dict = {}  # 按prefix各自记录上次刷新时间：不同进度条（写入/整体进度）互不抢节流窗口
 
 
 def progress_bar(done: int, total: int, prefix: str = "", bar_len: int | None = None) -> None:
     """
-    显示进度条，直观展示任务完成比例
+    显示进度条，直观展示任务完成比例（中间刷新按时间节流，首尾帧始终输出）
     :param done: 已完成数量
     :param total: 总数量
     :param prefix: 进度条前缀文本
@@ -55,6 +76,11 @@ def progress_bar(done: int, total: int, prefix: str = "", bar_len: int | None =
     """
     if total <= 0:
         return
+    # 未到刷新间隔的中间帧直接跳过（0/total的起始帧和done>=total的结束帧不节流）
+    now_ts = time.monotonic()
+    if 0 < done < total and now_ts - _progress_last_ts.get(prefix, 0.0) < _PROGRESS_MIN_INTERVAL:
+        return
+    _progress_last_ts[prefix] = now_ts
     # 自动计算进度条长度（适应终端宽度，限制在10-40字符）
     if bar_len is None:
         try:
@@ -74,21 +100,60 @@ def progress_bar(done: int, total: int, prefix: str = "", bar_len: int | None =
 @contextmanager
 def excel_quiet(app):
     """
-    上下文管理器：临时关闭Excel的事件响应、弹窗和屏幕刷新
-    用途：加速Excel操作，避免插件弹窗干扰
+    上下文管理器：临时关闭Excel的事件响应、弹窗、屏幕刷新、自动重算和用户交互
+    用途：加速Excel批量写入（公式模板不再每写一次就全表重算），避免插件弹窗和误点击干扰
     """
     # 保存原始设置
     old_alerts = app.DisplayAlerts
     old_events = app.EnableEvents
     old_update = app.ScreenUpdating
+    # 重入保护：三项全关说明外层已持有静默窗口，内层直接透传——
+    # 不重复保存/切换，退出时也不提前CalculateFull（重算只在最外层恢复时做一次）
+    if not (old_alerts or old_events or old_update):
+        yield
+        return
+    try:
+        old_calc = app.Calculation
+    except Exception:  # 没有打开的工作簿时读不到Calculation
+        old_calc = None
+    try:
+        old_interactive = app.Interactive
+    except Exception:
+        old_interactive = None
+    try:
+        old_statusbar = app.DisplayStatusBar
+    except Exception:
+        old_statusbar = None
     try:
         # 关闭干扰项
         app.DisplayAlerts = False
         app.EnableEvents = False
         app.ScreenUpdating = False
+        if old_statusbar is not None:
+            app.DisplayStatusBar = False  # 状态栏刷新也会触发重绘
+        if old_calc is not None:
+            app.Calculation = win32.constants.xlCalculationManual
+        if old_interactive is not None:
+            app.Interactive = False
         yield  # 执行with块内的代码
     finally:
-        # 恢复原始设置
+        # 恢复原始设置，并在恢复自动重算前手动全量重算一次
+        try:
+            if old_calc is not None:
+                app.CalculateFull()
+                app.Calculation = old_calc
+        except Exception:
+            pass
+        try:
+            if old_interactive is not None:
+                app.Interactive = old_interactive
+        except Exception:
+            pass
+        try:
+            if old_statusbar is not None:
+                app.DisplayStatusBar = old_statusbar
+        except Exception:
+            pass
         app.ScreenUpdating = old_update
         app.EnableEvents = old_events
         app.DisplayAlerts = old_alerts
@@ -99,18 +164,13 @@ def get_desktop_path() -> Path:
     获取系统桌面路径（兼容OneDrive桌面和普通桌面）
     优先级：OneDrive桌面 → 用户目录桌面 → 主目录桌面 → 主目录
     """
-    candidates = [
+    candidates = (
         Path(os.path.expandvars(r"%OneDrive%")) / "Desktop",  # OneDrive桌面（若存在）
         Path(os.path.expandvars(r"%USERPROFILE%")) / "Desktop",  # 用户目录桌面
         Path.home() / "Desktop",  # 主目录桌面
-    ]
-    for p in candidates:
-        try:
-            if p.exists():  # 检查路径是否存在
-                return p
-        except Exception:
-            pass
-    return Path.home()  # 兜底：返回主目录
+    )
+    # 生成器短路：命中第一个存在的目录即返回，兜底主目录
+    return next((p for p in candidates if p.is_dir()), Path.home())
 
 
 def prompt_path_with_retry(
@@ -160,16 +220,41 @@ def wait_active_workbook(excel_app, tip: str):
     :return: 激活的工作簿对象
     """
     while True:
-        wb = excel_app.ActiveWorkbook  # 获取当前激活的工作簿
-        if wb:
-            return wb
-        # 未检测到激活的工作簿，提示用户操作
+        # 指数退避轮询（10ms起步、封顶500ms、约2秒窗口）：刚激活的工作簿可能要几十毫秒
+        # 才能查到，Excel忙时（正在打开文件）COM调用还会直接被拒，退避重试两者都能吸收
+        delay = 0.01
+        waited = 0.0
+        while waited < 2.0:
+            try:
+                wb = excel_app.ActiveWorkbook  # 获取当前激活的工作簿
+            except pythoncom.com_error:  # Excel正忙，拒绝了本次调用
+                wb = None
+            if wb:
+                return wb
+            time.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, 0.5)
+        # 窗口内始终未检测到激活的工作簿，提示用户操作
         user = input(tip + "（打开并激活后按回车；输入 q 退出）：").strip().lower()
         if user == "q":
             print("👋 已退出。")
             sys.exit(1)
 
 
+# ------------------- 预编译正则（模块级，避免每次调用重复编译/查缓存） -------------------
+_CN_DATE_STR_RE = re.compile(r"(\d{4}年\d{1,2}月\d{1,2}日)")          # 完整中文日期串
+_CN_DATE_RE = re.compile(r"(\d{4})年(\d{1,2})月(\d{1,2})日")          # 中文日期（分组捕获年月日）
+_GRADE_RE = re.compile(r"本次检测共测试([一二])级焊缝")                    # 质量等级
+_FLOAT_RE = re.compile(r"(-?\d+(?:\.\d+)?)")                         # 数字（整数或小数）
+_TOKEN_SPLIT_RE = re.compile(r"[、，,;；\s]+")                          # 检测依据分隔符
+_DAY_MARK_RE = re.compile(r"(\d{1,2})\s*[.．。/月]\s*(\d{1,2})")       # F列日期标记（如“3.31”“4/4”“4月4日”，兼容全角句点）
+_DATE_FALLBACK_RE = re.compile(r"探伤日期[:：]?\s*([0-9年月日～\-\s]+)")              # 探伤日期兜底
+_PROC_FALLBACK_RE = re.compile(r"执行处理[:：]?\s*([A-Za-z0-9/—、，,;；\s-]+)")      # 执行处理兜底
+_PROBE_SPLIT_RE = re.compile(r"[、,，;；\s]+")                         # Word探头型号分隔符
+# normalize_code 的字符归一表（全角/长横线→半角连字符，去空格）
+_NORM_TABLE = str.maketrans({"—": "-", "－": "-", " ": ""})
+
+
 # ------------------- Word 解析辅助 -------------------
 # Word中需要提取的关键标签列表（用于识别表格/段落中的关键信息）
 label_tokens = [
@@ -179,25 +264,49 @@ label_tokens = [
 ]
 
 
+# 表格提取的目标字段与标签关键词映射（模块级元组，避免在逐行循环里重建列表）
+WORD_FIELD_LABELS: Tuple[Tuple[str, str], ...] = (
+    ('委托编号', '委托编号'),
+    ('工程名称', '工程名称及'),
+    ('检测部位', '检测部位'),
+    ('材质', '材质'),
+    ('探头型号', '探头型号'),
+    ('探伤日期', '探伤日期'),
+    ('执行处理', '执行处理'),
+)
+
+
+# Word表格低层遍历用的XML标签名（一次解析命名空间，循环里直接复用）
+_W_TC = qn('w:tc')  # 单元格
+_W_T = qn('w:t')    # 文本节点
+
+
+# 标签关键词编译成单个alternation正则（长词优先），一次C级扫描替代27次子串查找
+_LABEL_RE = re.compile("|".join(map(re.escape, sorted(label_tokens, key=len, reverse=True))))
+
+
+@lru_cache(maxsize=4096)  # 表格单元格文本高度重复，缓存判定结果
 def is_label(text: str) -> bool:
     """判断文本是否为标签（含标签关键词或为空）"""
     t = (text or '').strip()
-    return not t or any(tok in t for tok in label_tokens)
+    return not t or _LABEL_RE.search(t) is not None
 
 
+@lru_cache(maxsize=256)
 def first_date_str(date_range: str) -> str:
     """从日期范围字符串中提取第一个日期（如“2023年3月1日-3月5日”→“2023年3月1日”）"""
-    match: Optional[ReMatch[str]] = re.search(r"(\d{4}年\d{1,2}月\d{1,2}日)", date_range or "")
+    match: Optional[ReMatch[str]] = _CN_DATE_STR_RE.search(date_range or "")
     return match.group(1) if match is not None else (date_range or '').strip()
 
 
+@lru_cache(maxsize=256)  # 多日期场景下同一日期串会被反复解析
 def parse_cn_date(s: str):
     """
     解析中文日期字符串（如“2023年3月1日”）为datetime对象
     :param s: 中文日期字符串
     :return: 对应的datetime对象，解析失败返回None
     """
-    match: Optional[ReMatch[str]] = re.search(r"(\d{4})年(\d{1,2})月(\d{1,2})日", s or "")
+    match: Optional[ReMatch[str]] = _CN_DATE_RE.search(s or "")
     if match is None:
         return None
     y, m, d = map(int, match.groups())
@@ -207,13 +316,14 @@ def parse_cn_date(s: str):
         return None
 
 
+@lru_cache(maxsize=256)  # 原始日期串在主流程中会被重复解析，与parse_cn_date同样缓存
 def parse_cn_date_range(text: str):
     """
     解析中文日期范围（如“2023年3月1日至3月5日”）为开始和结束datetime对象
     :param text: 包含日期范围的文本
     :return: (开始日期, 结束日期)，解析失败返回(None, None)
     """
-    parts = re.findall(r"(\d{4})年(\d{1,2})月(\d{1,2})日", text or "")  # 提取所有日期
+    parts = _CN_DATE_RE.findall(text or "")  # 提取所有日期
     if not parts:
         return None, None
     if len(parts) == 1:  # 只有一个日期
@@ -251,63 +361,86 @@ def extract_data_from_word(word_path: Union[str, Path]) -> dict:
     :return: 提取的关键信息字典（如委托编号、工程名称等）
     """
     doc = Document(str(word_path))
-    # 提取所有段落文本（过滤空行）
-    paragraph_texts = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-
-    table_texts: List[str] = []  # 存储所有表格文本（用于兜底解析）
     result: dict = {}  # 存储提取的结果
 
-    # 优先从表格中提取信息
+    # 兜底解析状态：随文本产出增量更新，不再把全文拼成大字符串后反复整体扫描
+    grade: Optional[str] = None        # 质量等级（正则优先）
+    has_lv1 = has_lv2 = False          # “一级”“二级”关键词兜底
+    date_fallback: Optional[str] = None  # 探伤日期兜底
+    proc_fallback: Optional[str] = None  # 执行处理兜底
+    date_tail: Optional[List[str]] = None  # 最后一次“探伤日期”之后的原始文本片段
+
+    def scan_fallback(text: str) -> None:
+        """对单段文本做兜底字段匹配（每个正则只在未命中时运行，命中即停）"""
+        nonlocal grade, has_lv1, has_lv2, date_fallback, proc_fallback, date_tail
+        if grade is None:
+            m = _GRADE_RE.search(text)
+            if m is not None:
+                grade = f"{m.group(1)}级"
+        if not has_lv1 and "一级" in text:
+            has_lv1 = True
+        if not has_lv2 and "二级" in text:
+            has_lv2 = True
+        if date_fallback is None:
+            m = _DATE_FALLBACK_RE.search(text)
+            if m is not None:
+                date_fallback = m.group(1).strip()
+        if proc_fallback is None:
+            m = _PROC_FALLBACK_RE.search(text)
+            if m is not None:
+                proc_fallback = m.group(1).strip()
+        # 跟踪最后一次出现“探伤日期”之后的文本（用于后续日期范围解析）
+        if "探伤日期" in text:
+            date_tail = [text.rsplit("探伤日期", 1)[-1]]
+        elif date_tail is not None:
+            date_tail.append(text)
+
+    # 优先从表格中提取信息（表格文本顺带做兜底扫描）
     for tbl in doc.tables:
         for row in tbl.rows:
-            cells = [c.text for c in row.cells]  # 行内所有单元格文本
-            table_texts.extend([c.strip() for c in cells if c.strip()])  # 收集表格文本
+            # 直接在lxml层遍历 w:tc/w:t 取文本，绕开row.cells的_Cell对象构建与合并追踪
+            cells = tuple(
+                "".join(t.text or "" for t in tc.iter(_W_T))
+                for tc in row._tr.iter(_W_TC)
+            )
+            for c in cells:
+                c = c.strip()
+                if c:
+                    scan_fallback(c)
             # 提取目标字段（标签与目标字段映射）
-            for target, label in [
-                ('委托编号','委托编号'),
-                ('工程名称','工程名称及'),
-                ('检测部位','检测部位'),
-                ('材质','材质'),
-                ('探头型号','探头型号'),
-                ('探伤日期','探伤日期'),
-                ('执行处理','执行处理'),
-            ]:
+            for target, label in WORD_FIELD_LABELS:
                 if target not in result:  # 已提取的字段不再重复处理
                     v = value_after_label(cells, label)
                     if v:
                         result[target] = v
 
-    # 合并表格和段落文本，用于兜底解析（表格中未提取到的信息）
-    full_text = "\n".join(table_texts + paragraph_texts)
-
-    # 提取质量等级（从全文中匹配）
-    match_grade: Optional[ReMatch[str]] = re.search(r"本次检测共测试([一二])级焊缝", full_text)
-    if match_grade is not None:
-        result["质量等级"] = f"{match_grade.group(1)}级"
-    else:
-        # 兜底：直接匹配“一级”或“二级”关键词
-        if "一级" in full_text:
-            result["质量等级"] = "一级"
-        elif "二级" in full_text:
-            result["质量等级"] = "二级"
-
-    # 探伤日期兜底（表格中未提取到时，从全文匹配）
-    if not result.get("探伤日期"):
-        match_date: Optional[ReMatch[str]] = re.search(r"探伤日期[:：]?\s*([0-9年月日～\-\s]+)", full_text)
-        if match_date is not None:
-            result["探伤日期"] = match_date.group(1).strip()
+    # 段落文本兜底扫描（过滤空行）
+    for p in doc.paragraphs:
+        t = p.text.strip()
+        if t:
+            scan_fallback(t)
+
+    # 提取质量等级（正则优先，关键词兜底）
+    if grade is not None:
+        result["质量等级"] = grade
+    elif has_lv1:
+        result["质量等级"] = "一级"
+    elif has_lv2:
+        result["质量等级"] = "二级"
+
+    # 探伤日期兜底（表格中未提取到时用扫描结果）
+    if not result.get("探伤日期") and date_fallback:
+        result["探伤日期"] = date_fallback
     # 格式化探伤日期（取第一个日期）
     if result.get("探伤日期"):
         result["探伤日期"] = first_date_str(result["探伤日期"])
 
     # 执行处理（检测依据）兜底
-    if not result.get("执行处理"):
-        match_proc: Optional[ReMatch[str]] = re.search(r"执行处理[:：]?\s*([A-Za-z0-9/—、，,;；\s-]+)", full_text)
-        if match_proc is not None:
-            result["执行处理"] = match_proc.group(1).strip()
+    if not result.get("执行处理") and proc_fallback:
+        result["执行处理"] = proc_fallback
 
     # 保存原始探伤日期相关文本（用于后续日期解析）
-    result["_原始探伤日期串"] = full_text.split("探伤日期")[-1] if "探伤日期" in full_text else result.get("探伤日期", "")
+    result["_原始探伤日期串"] = "\n".join(date_tail) if date_tail is not None else result.get("探伤日期", "")
     return result
 
 
@@ -316,37 +449,66 @@ def extract_data_from_word(word_path: Union[str, Path]) -> dict:
 month_mean = {1:-3,2:0,3:6,4:14,5:20,6:24,7:26,8:25,9:20,10:13,11:5,12:-1}
 
 
+def _temp_guess(month: int, day: int, days_in_month: int) -> str:
+    """按月均温线性插值+伪随机微扰计算单天温度字符串（建表用）"""
+    next_month = 1 if month == 12 else month + 1
+    # 计算当月内的插值比例（0-1）
+    frac = (day - 1) / max(days_in_month - 1, 1)
+    # 月均温插值（线性）
+    base = month_mean[month] + frac * (month_mean[next_month] - month_mean[month])
+    # 随机微扰（基于日期的伪随机，范围-2~2）
+    wiggle = ((day * 37) % 5) - 2
+    return str(int(round(base + wiggle)))
+
+
+# 导入时预生成全年(月,日)→温度查找表（定义域只有366个，建表比逐次计算更快）
+_TEMP_TABLE: dict = {}
+for _m in range(1, 13):
+    _dim = (datetime(2025, _m + 1, 1) - datetime(2025, _m, 1)).days if _m < 12 else 31  # 平年当月天数
+    for _d in range(1, _dim + 1):
+        _TEMP_TABLE[(_m, _d)] = _temp_guess(_m, _d, _dim)
+_TEMP_TABLE[(2, 29)] = _temp_guess(2, 29, 29)  # 闰年2月29日特例
+del _m, _dim, _d
+
+
 def beijing_temp_guess_number(dt: datetime) -> str:
     """
-    根据日期估计北京的检测环境温度（月均温插值+随机微扰）
+    根据日期估计北京的检测环境温度（查预生成的月均温插值表）
     :param dt: 日期
     :return: 估计的温度字符串（整数）
     """
     if not dt:
         return ""
-    month, year = dt.month, dt.year
-    # 计算当月天数和下个月（用于插值）
-    if month == 12:
-        days_in_month = (datetime(year+1,1,1) - datetime(year,12,1)).days  # 12月天数
-        next_month = 1
-    else:
-        days_in_month = (datetime(year,month+1,1) - datetime(year,month,1)).days  # 当月天数
-        next_month = month + 1
-    # 计算当月内的插值比例（0-1）
-    frac = (dt.day - 1) / max(days_in_month - 1, 1)
-    # 月均温插值（线性）
-    base = month_mean[month] + frac * (month_mean[next_month] - month_mean[month])
-    # 随机微扰（基于日期的伪随机，范围-2~2）
-    wiggle = ((dt.day * 37) % 5) - 2
-    return str(int(round(base + wiggle)))
+    return _TEMP_TABLE.get((dt.month, dt.day), "")
 
 
+@lru_cache(maxsize=256)
 def format_cn_date(dt: datetime) -> str:
     """将datetime对象格式化为中文日期字符串（如“2023年3月1日”）"""
     return f"{dt.year}年{dt.month}月{dt.day}日"
 
 
 # ------------------- Excel 辅助 -------------------
+def _value2_rows(v) -> tuple:
+    """
+    把 Range.Value2 的返回值统一成二维元组
+    说明：COM对单格返回标量、单行返回一维元组，这里补齐维度方便统一按 [行][列] 索引
+    """
+    if not isinstance(v, tuple):
+        return ((v,),)
+    if v and not isinstance(v[0], tuple):
+        return (v,)
+    return v
+
+
+def _block(ws, row: int, col: int, nrows: int, ncols: int):
+    """
+    取以(row,col)为锚点、nrows×ncols大小的区域
+    说明：单锚点Cells+Resize共两次COM调用，比双锚点Range(Cells,Cells)的三次少一次封送
+    """
+    return ws.Cells(row, col).Resize(nrows, ncols)
+
+
 def get_sheet_by_names(workbook, name_candidates: List[str]):
     """
     根据候选名称从工作簿中查找工作表（忽略名称顺序）
@@ -381,7 +543,7 @@ def put_value(sheet, rng: str, value: str):
 # ---- 检测依据分发 ----
 def normalize_code(s: str) -> str:
     """标准化检测依据代码（统一大小写、替换特殊符号）"""
-    return (s or "").upper().replace(" ", "").replace("—", "-").replace("－", "-")
+    return (s or "").translate(_NORM_TABLE).upper()
 
 
 def write_detection_basis(sheet, basis_str: str):
@@ -400,13 +562,12 @@ def write_detection_basis(sheet, basis_str: str):
         "GB/T29712-2023": "G12:G12",
         "GB/T29711-2023": "H12:H12",
     }
-    # 先清空目标区域
-    for addr in ["B12:B12","C12:C12","D12:D12","E12:E12","F12:F12","G12:G12","H12:H12","I12:J12"]:
-        put_value(sheet, addr, "")
+    # 先清空目标区域（整段一次ClearContents，真正清空单元格而非写入空串）
+    sheet.Range("B12:J12").ClearContents()
     if not basis_str:
         return
     # 拆分检测依据为多个 token
-    tokens = [t for t in re.split(r"[、，,;；\s]+", basis_str) if t.strip()]
+    tokens = [t for t in _TOKEN_SPLIT_RE.split(basis_str) if t.strip()]
     unknown_list: List[str] = []  # 存储未识别的代码
     used: set = set()  # 记录已使用的标准代码（去重）
     for token in tokens:
@@ -421,6 +582,91 @@ def write_detection_basis(sheet, basis_str: str):
         put_value(sheet, "I12:J12", ", ".join(unknown_list))
 
 
+# ------------------- 外部数据Excel一次性读取 -------------------
+_EXCEL_EPOCH = datetime(1899, 12, 30)  # Excel 1900日期系统的序列数起点（Value2把日期型单元格给成序列数）
+
+
+def _read_source_rows_com(data_excel_path: Path) -> Tuple[tuple, int]:
+    """COM方式整块读取源表（仅用于openpyxl不支持的.xls老格式）"""
+    excel_app = win32.gencache.EnsureDispatch("Excel.Application")  # 早绑定，属性访问更快
+    # 只读打开：跳过外部链接刷新、只读建议弹窗和最近文件记录，减少Open阶段开销
+    with excel_quiet(excel_app):
+        wb = excel_app.Workbooks.Open(Filename=str(data_excel_path),
+                                      UpdateLinks=0,
+                                      ReadOnly=True,
+                                      IgnoreReadOnlyRecommended=True,
+                                      Notify=False,
+                                      AddToMru=False,
+                                      Local=True)
+    try:
+        sheet = wb.Sheets(1)  # 取第一个工作表
+        cells = sheet.Cells  # 缓存Cells代理，避免重复属性查询
+        # .xls（兼容模式）只有65536行，写死xlsx的1048576会让Cells越界抛com_error；
+        # Rows.Count每次打开只读一次，相对Workbooks.Open可以忽略
+        max_row = sheet.Rows.Count
+        # 最后有效行：取B列（数据）和F列（日期标记）较大者
+        last_row_b = cells(max_row, 2).End(win32.constants.xlUp).Row
+        last_row_f = cells(max_row, 6).End(win32.constants.xlUp).Row
+        last_row = max(last_row_b, last_row_f)
+        # 一次性读取 A1 到第30列（备注列探测上限）的整块数据（锚点+Resize，省一次Range封送）
+        rows = _value2_rows(_block(sheet, 1, 1, last_row, 30).Value2)
+        return rows, last_row
+    finally:
+        wb.Close(SaveChanges=False)  # 关闭工作簿，不保存
+
+
+def _read_source_rows_openpyxl(data_excel_path: Path) -> Tuple[tuple, int]:
+    """openpyxl流式只读整表（纯文件IO，不启动Excel进程，读取比COM快一个量级）"""
+    wb = load_workbook(str(data_excel_path), read_only=True, data_only=True,
+                       keep_links=False)  # 不解析外部链接定义，进一步缩短Open耗时
+    try:
+        ws = wb.worksheets[0]  # 取第一个工作表
+        # 读到第30列（备注列探测上限），values_only直接拿到纯值元组
+        rows = tuple(ws.iter_rows(min_col=1, max_col=30, values_only=True))
+    finally:
+        wb.close()
+    # 最后有效行：取B列（数据）和F列（日期标记）较大者（read_only的max_row可能虚高）
+    last_row = 1
+    for i, row in enumerate(rows, start=1):
+        if str(row[1] or "").strip() or str(row[5] or "").strip():
+            last_row = i
+    return rows[:last_row], last_row
+
+
+def load_source_data(data_excel_path: Path) -> Optional[dict]:
+    """
+    一次性读取外部数据Excel并缓存为Python数据（打开→整块读取→关闭）
+    后续的探头选型、日期拆分、数据拷贝都直接用缓存，不再反复打开文件
+    :param data_excel_path: 数据Excel路径
+    :return: {"rows": 二维元组（按 rows[行-1][列-1] 索引）, "last_row": 最后有效行号,
+             "remark_col": 备注列号（没有则为None）}；文件不存在返回None
+    """
+    if not data_excel_path.exists():
+        return None
+
+    # xlsx走openpyxl纯Python读取；.xls老格式openpyxl不支持，保留COM通道
+    if data_excel_path.suffix.lower() == ".xls":
+        rows, last_row = _read_source_rows_com(data_excel_path)
+    else:
+        rows, last_row = _read_source_rows_openpyxl(data_excel_path)
+
+    # 自动探测“备注”列（查找表头为“备注”的列，先第1行命中即止，缺失才落到第2行）
+    remark_col = None
+    for probe_row in (1, 2):
+        if probe_row > len(rows):  # 空表时rows为()而last_row仍为1，按实际行数兜底
+            break
+        for c, title in enumerate(rows[probe_row - 1], start=1):
+            # 表头只可能是字符串，非字符串单元格直接跳过（省去str()转换）
+            if isinstance(title, str) and title.strip() == "备注":
+                remark_col = c
+                break
+        if remark_col:
+            break
+
+    return {"rows": rows, "last_row": last_row, "remark_col": remark_col}
+
+
+
 # ------------------- 探头自动选型（按 D列板厚 + C列焊缝类型） -------------------
 # 探头选型规则：键为焊缝类型（'D'对接；'JD'角对接），值为(板厚下限, 板厚上限, 探头清单)
 PROBE_RULES: dict[str, List[Tuple[float, float, List[str]]]] = {
@@ -445,12 +691,31 @@ PROBE_RULES: dict[str, List[Tuple[float, float, List[str]]]] = {
 }
 
 
+# 预构建选型查找表：每种焊缝类型拆成(下限数组, 上限数组, 探头清单数组)
+# 板厚匹配用bisect二分定位区间，替代逐行对规则表的线性扫描
+_PROBE_LOOKUP: dict = {
+    wt: ([low for low, _high, _models in rules],
+         [high for _low, high, _models in rules],
+         [models for _low, _high, models in rules])
+    for wt, rules in PROBE_RULES.items()
+}
+
+
+def _probe_models_for(weld_type: str, thickness: float) -> Optional[List[str]]:
+    """按焊缝类型和板厚二分查找探头清单，板厚不在任何区间内返回None"""
+    lows, highs, models_list = _PROBE_LOOKUP[weld_type]
+    idx = bisect.bisect_right(lows, thickness) - 1
+    if idx < 0 or thickness >= highs[idx]:
+        return None
+    return models_list[idx]
+
+
 def _to_float(x) -> Optional[float]:
     """将输入转换为浮点数（提取数字部分），失败返回None"""
     if x is None:
         return None
     s = str(x).strip()
-    m = re.search(r"(-?\d+(?:\.\d+)?)", s)  # 匹配数字（整数或小数）
+    m = _FLOAT_RE.search(s)  # 匹配数字（整数或小数）
     if not m:
         return None
     try:
@@ -477,51 +742,44 @@ def _pick_weld_type(cell_c, cell_alt=None) -> Optional[str]:
     return None
 
 
-def choose_probes_for_segments(data_excel_path: Path,
+def choose_probes_for_segments(source: Optional[dict],
                                segments: Optional[List[Tuple[int, int]]]) -> List[str]: # noqa
     """
     根据数据Excel中的板厚和焊缝类型自动选择探头型号
-    :param data_excel_path: 数据Excel路径
+    :param source: load_source_data 返回的缓存数据字典
     :param segments: 行段列表（(开始行, 结束行)），None表示全部行
     :return: 选好的探头型号列表（去重，最多8个）
     """
-    if not data_excel_path.exists():
+    if not source:
         return []
-
-    excel_app = win32.Dispatch("Excel.Application")
-    wb = excel_app.Workbooks.Open(str(data_excel_path), ReadOnly=True)  # 只读打开
-    xl_up = -4162  # Excel常量：向上查找
-    try:
-        ws = wb.Sheets(1)  # 取第一个工作表
-        last_row = ws.Cells(ws.Rows.Count, 2).End(xl_up).Row  # B列最后一行有数据的行号
-        if segments is None:
-            segments = [(2, last_row)]  # 默认为第2行到最后一行
-
-        picked: List[str] = []  # 选中的探头型号
-        seen = set()  # 去重集合
-
-        # 遍历所有行段
-        for (s, e) in segments:
-            s = max(s, 2); e = min(e, last_row)  # 确保行号有效
-            for r in range(s, e + 1):
-                # 获取焊缝类型（C列）
-                weld_type = _pick_weld_type(ws.Cells(r, 3).Value)
-                if weld_type not in PROBE_RULES:
-                    continue
-                # 获取板厚（D列优先，E列兜底）
-                thickness = _to_float(ws.Cells(r, 4).Value) or _to_float(ws.Cells(r, 5).Value)
-                if thickness is None:
-                    continue
-                # 根据板厚匹配探头
-                for low, high, models in PROBE_RULES[weld_type]:
-                    if (thickness >= low) and (thickness < high):
-                        for m in models:
-                            if m not in seen:
-                                picked.append(m); seen.add(m)
-                        break  # 匹配到后跳出循环
-        return picked[:8]  # 最多返回8个
-    finally:
-        wb.Close(SaveChanges=False)  # 关闭工作簿，不保存
+    rows_src = source["rows"]
+    last_row = source["last_row"]
+    if segments is None:
+        segments = [(2, last_row)]  # 默认为第2行到最后一行
+
+    picked: List[str] = []  # 选中的探头型号
+    seen = set()  # 去重集合
+
+    # 遍历所有行段
+    for (s, e) in segments:
+        s = max(s, 2); e = min(e, last_row)  # 确保行号有效
+        for r in range(s, e + 1):
+            row = rows_src[r - 1]  # 缓存数据按 rows[行-1][列-1] 索引
+            # 获取焊缝类型（C列）
+            weld_type = _pick_weld_type(row[2])
+            if weld_type not in PROBE_RULES:
+                continue
+            # 获取板厚（D列优先，E列兜底）
+            thickness = _to_float(row[3]) or _to_float(row[4])
+            if thickness is None:
+                continue
+            # 根据板厚匹配探头（二分查找区间）
+            models = _probe_models_for(weld_type, thickness)
+            if models:
+                for m in models:
+                    if m not in seen:
+                        picked.append(m); seen.add(m)
+    return picked[:8]  # 最多返回8个
 
 
 # ------------------- 写第一张：基础信息 -------------------
@@ -556,279 +814,311 @@ def fill_sheet_basic(workbook, data: dict,
     # 估计检测环境温度
     temp_number = beijing_temp_guess_number(chosen_date)
 
+    # 先在Python侧把所有写入汇总到 {区域: 值} 字典，最后统一落盘（便于合并连续区域）
+    writes: dict = {}
+
     # 填充固定值字段
-    put_value(sheet, cols["仪器编号"], instrument)
-    if temp_number: put_value(sheet, cols["检测环境"], temp_number)
-    put_value(sheet, cols["测试人"], "于征")
-    put_value(sheet, cols["K值角度"], "角度")
-    put_value(sheet, cols["表面补偿"], "4dB")
-    put_value(sheet, cols["检测灵敏度"], "DAC-14dB")
-    put_value(sheet, cols["表面状况"], "磨光")
-    put_value(sheet, cols["焊接方式"], "气保")
-    put_value(sheet, cols["检测时机"], "焊后24h")
-    put_value(sheet, cols["坡口形式"], "L")
+    writes[cols["仪器编号"]] = instrument
+    if temp_number: writes[cols["检测环境"]] = temp_number
+    writes[cols["测试人"]] = "于征"
+    writes[cols["K值角度"]] = "角度"
+    writes[cols["表面补偿"]] = "4dB"
+    writes[cols["检测灵敏度"]] = "DAC-14dB"
+    writes[cols["表面状况"]] = "磨光"
+    writes[cols["焊接方式"]] = "气保"
+    writes[cols["检测时机"]] = "焊后24h"
+    writes[cols["坡口形式"]] = "L"
 
     # 填充从Word提取的字段
-    if v := data.get("工程名称"): put_value(sheet, cols["工程名称"], v)
-    if v := data.get("委托编号"): put_value(sheet, cols["委托编号"], v)
-    if v := data.get("材质"):    put_value(sheet, cols["材质"], v)
-    if chosen_date:              put_value(sheet, cols["探伤日期"], format_cn_date(chosen_date))
-    if v := data.get("质量等级"): put_value(sheet, cols["质量等级"], v)
+    if v := data.get("工程名称"): writes[cols["工程名称"]] = v
+    if v := data.get("委托编号"): writes[cols["委托编号"]] = v
+    if v := data.get("材质"):    writes[cols["材质"]] = v
+    if chosen_date:              writes[cols["探伤日期"]] = format_cn_date(chosen_date)
+    if v := data.get("质量等级"): writes[cols["质量等级"]] = v
 
     # 处理扫查方式和备注（根据检测部位判断）
     part = data.get("检测部位", "")
     has_corner = "角对接焊缝" in part
     has_butt = "对接焊缝" in part
     if has_corner and has_butt:
-        sheet.Range("B11").Value = "单面单侧"
-        sheet.Range("C11").Value = "单面双侧"
-        put_value(sheet, cols["备注"], "注：D表示对接、JD表示角对接")
+        writes["B11"] = "单面单侧"
+        writes["C11"] = "单面双侧"
+        writes[cols["备注"]] = "注：D表示对接、JD表示角对接"
     elif has_corner:
-        sheet.Range("B11").Value = "单面单侧"
-        put_value(sheet, cols["备注"], "注：JD表示角对接")
+        writes["B11"] = "单面单侧"
+        writes[cols["备注"]] = "注：JD表示角对接"
     else:
-        sheet.Range("B11").Value = "单面双侧"
-        put_value(sheet, cols["备注"], "注：D表示对接")
+        writes["B11"] = "单面双侧"
+        writes[cols["备注"]] = "注：D表示对接"
 
     # 填充试块信息
-    sheet.Range("F6").Value = "CSK-IA"
-    sheet.Range("H6").Value = "RB-1"
-    sheet.Range("I6").Value = "RB-2"
+    writes["F6"] = "CSK-IA"
+    writes["H6"] = "RB-1"
+    writes["I6"] = "RB-2"
 
     # 填充耦合剂
-    put_value(sheet, "B7:D7", "化学浆糊")
-    put_value(sheet, "B8:D8", "化学浆糊")
+    writes["B7:D7"] = "化学浆糊"
+    writes["B8:D8"] = "化学浆糊"
 
-    # 填充检测依据
-    write_detection_basis(sheet, data.get("执行处理", ""))
-
-    # 填充探头型号（优先自动选型，其次Word提取，最多8个）
-    for i in range(13, 21):  # 清空B13到B20
-        sheet.Range(f"B{i}").Value = ""
+    # 探头型号（优先自动选型，其次Word提取，最多8个）
     if override_probes is not None:
-        for i, p in enumerate(override_probes[:8]):
-            sheet.Range(f"B{13+i}").Value = p
+        probes = list(override_probes)
     else:
-        # 从Word提取的探头型号拆分后填充
-        probes = re.split(r"[、,，;；\s]+", (data.get("探头型号") or "").strip())
+        # 从Word提取的探头型号拆分
+        probes = _PROBE_SPLIT_RE.split((data.get("探头型号") or "").strip())
         probes = [p for p in probes if p]
-        for i, p in enumerate(probes[:8]):
-            sheet.Range(f"B{13+i}").Value = p
+    # 补齐到8项（多余位置写None即清空），B13:B20整列一次写入
+    probes_padded = (probes[:8] + [None] * 8)[:8]
+
+    # 静默模式下统一落盘（关闭弹窗/刷新/自动重算，结束时统一重算一次）
+    with excel_quiet(workbook.Application):
+        for addr, value in writes.items():
+            put_value(sheet, addr, value)
+        # 填充检测依据
+        write_detection_basis(sheet, data.get("执行处理", ""))
+        # 填充探头型号：单次区域赋值替代逐格写入（同时覆盖清空）
+        sheet.Range("B13:B20").Value = [[p] for p in probes_padded]
 
 
 # ------------------- 第二张：数据信息（按需插行 + 进度条） -------------------
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    合并相邻/重叠的行段（如[(2,5),(6,9),(12,14)]→[(2,9),(12,14)]）
+    同一天的行段在源表里往往物理相邻，合并后遍历段数更少
+    """
+    out: List[Tuple[int, int]] = []
+    for s, e in sorted(ranges):
+        if out and s <= out[-1][1] + 1:  # 与上一段相邻或重叠，直接并入
+            if e > out[-1][1]:
+                out[-1] = (out[-1][0], e)
+        else:
+            out.append((s, e))
+    return out
+
+
+def _gather_copy_rows(source: dict,
+                      row_ranges: List[Tuple[int, int]]) -> Tuple[List[tuple], int]:
+    """
+    从缓存数据中收集要拷贝的行（A、D、E、F列对应源表B、C、D、E列，M列对应备注列）
+    纯Python计算，不碰COM——多日期场景下可放到生产者线程里提前算好
+    :param source: load_source_data 返回的缓存数据字典
+    :param row_ranges: 要拷贝的行段列表（已合并）
+    :return: (行元组列表, 总行数)
+    """
+    rows_src = source["rows"]
+    remark_col = source["remark_col"]
+    rows: List[tuple] = []
+    total_rows = 0
+    for s, e in row_ranges:
+        if e < s:
+            continue
+        for r in range(s, e + 1):
+            row = rows_src[r - 1]  # 缓存数据按 rows[行-1][列-1] 索引
+            rows.append((row[1],   # 目标A列 → 源表B列
+                         row[2],   # 目标D列 → 源表C列
+                         row[3],   # 目标E列 → 源表D列（板厚）
+                         row[4],   # 目标F列 → 源表E列（角度/回波）
+                         row[remark_col - 1] if remark_col else None))  # 目标M列 → 备注列
+        total_rows += (e - s + 1)
+    return rows, total_rows
+
+
 def fill_sheet_data(workbook_server,
-                    data_excel_path: Path,
-                    row_ranges: Optional[List[Tuple[int, int]]] = None) -> None:
+                    source: Optional[dict],
+                    row_ranges: Optional[List[Tuple[int, int]]] = None,
+                    prepared: Optional[Tuple[List[tuple], int]] = None) -> None:
     """
-    填充Excel中的“数据信息”工作表（从外部数据Excel拷贝数据）
+    填充Excel中的“数据信息”工作表（从缓存的外部数据拷贝）
     :param workbook_server: 目标工作簿对象
-    :param data_excel_path: 外部数据Excel路径
+    :param source: load_source_data 返回的缓存数据字典
     :param row_ranges: 要拷贝的行段列表，None表示全部行
+    :param prepared: 生产者线程预先算好的(行列表, 总行数)，None则现场收集
     """
-    # 定义Excel常量（兼容不同版本）
-    try:
-        const = win32.constants
-        xl_up = const.xlUp  # 向上查找
-        xl_paste_formats = const.xlPasteFormats  # 粘贴格式
-        color_index_none = getattr(const, 'xlColorIndexNone', -4142)  # 无颜色
-        pattern_none = getattr(const, 'xlPatternNone', -4142)  # 无填充
-    except Exception:
-        xl_up = -4162
-        xl_paste_formats = -4122
-        color_index_none = -4142
-        pattern_none = -4142
-
     # 获取“数据信息”工作表
     ws_dst = get_sheet_by_names(workbook_server, ["数据信息"]) or workbook_server.Sheets(2)
     app_dst = workbook_server.Application  # 目标Excel应用实例
+    rng_dst = ws_dst.Range  # 缓存Range访问器（每次ws_dst.Range都是一次COM属性查询）
     ws_dst.Activate()  # 激活工作表
 
-    # 检查数据文件是否存在
-    if not data_excel_path.exists():
-        print_step(f"⚠️ 没找到外部数据文件：{data_excel_path}，已跳过『数据信息』拷贝。")
+    # 检查缓存数据是否可用
+    if not source:
+        print_step("⚠️ 没有外部数据可用，已跳过『数据信息』拷贝。")
         return
 
-    # 打开外部数据Excel（只读）
-    app_src = win32.Dispatch("Excel.Application")
-    wb_src = app_src.Workbooks.Open(str(data_excel_path), ReadOnly=True)
+    last_row_src = source["last_row"]
+    remark_col = source["remark_col"]
 
-    try:
-        ws_src = wb_src.Sheets(1)  # 取第一个工作表
-        # 获取源表B列最后一行有数据的行号
-        last_row_src = ws_src.Cells(ws_src.Rows.Count, 2).End(xl_up).Row
+    # 收集要拷贝的数据（优先用生产者线程预先算好的结果）
+    if prepared is not None:
+        rows, total_rows = prepared
+    else:
         if row_ranges is None:
             if last_row_src < 2:  # 无数据
                 print_step("⚠️ 源表 B 列从第2行起没有数据，跳过复制。")
                 return
             row_ranges = [(2, last_row_src)]  # 默认为第2行到最后一行
+        else:
+            row_ranges = _merge_ranges(row_ranges)  # 相邻行段合并后再遍历
+        rows, total_rows = _gather_copy_rows(source, row_ranges)
 
-        # 自动探测“备注”列（查找表头为“备注”的列）
-        remark_col = None
-        for probe_row in (1, 2):  # 检查第1行和第2行
-            for c in range(1, 30):  # 前30列
-                title = str(ws_src.Cells(probe_row, c).Value or "").strip()
-                if title == "备注":
-                    remark_col = c
-                    break
-            if remark_col:
-                break
+    if total_rows <= 0:
+        print_step("⚠️ 没有需要拷贝的行。")
+        return
 
-        # 收集要拷贝的数据（A、D、E、F列对应源表B、C、D、E列，M列对应备注列）
-        rows: List[Tuple[object, object, object, object, object]] = []
-        total_rows = 0
-        for s, e in row_ranges:
-            if e < s:
-                continue
-            for r in range(s, e + 1):
-                a_val = ws_src.Cells(r, 2).Value   # 目标A列 → 源表B列
-                d_val = ws_src.Cells(r, 3).Value   # 目标D列 → 源表C列
-                e_val = ws_src.Cells(r, 4).Value   # 目标E列 → 源表D列（板厚）
-                f_val = ws_src.Cells(r, 5).Value   # 目标F列 → 源表E列（角度/回波）
-                m_val = ws_src.Cells(r, remark_col).Value if remark_col else None  # 目标M列 → 源表备注列
-                rows.append((a_val, d_val, e_val, f_val, m_val))
-            total_rows += (e - s + 1)
-
-        if total_rows <= 0:
-            print_step("⚠️ 没有需要拷贝的行。")
-            return
-
-        # 静默模式写入数据（关闭弹窗和刷新）
-        with excel_quiet(app_dst):
-            print_step(f"准备写入 {total_rows} 行数据…")
-            progress_bar(0, total_rows, prefix="写入")
-
-            start_row = 3  # 从第3行开始写入
-            end_row = start_row + total_rows - 1  # 计算结束行
-
-            # 清空目标区域旧内容（保留格式）
-            clear_to = max(end_row, 200 + 2)  # 至少清到202行
-            ws_dst.Range(f"A{start_row}:M{clear_to}").ClearContents()
-
-            # 复制第3行格式到目标行（确保格式一致）
+
+    # 静默模式写入数据（关闭弹窗和刷新）
+    with excel_quiet(app_dst):
+        print_step(f"准备写入 {total_rows} 行数据…")
+        progress_bar(0, total_rows, prefix="写入")
+
+        start_row = 3  # 从第3行开始写入
+        end_row = start_row + total_rows - 1  # 计算结束行
+
+        # 清空目标区域旧内容（保留格式）
+        clear_to = max(end_row, 200 + 2)  # 至少清到202行
+        rng_dst(f"A{start_row}:M{clear_to}").ClearContents()
+
+        # 把第3行格式扩展到整个目标区（确保格式一致）
+        if end_row > 3:
             try:
-                ws_dst.Range("A3:M3").Copy()
-                ws_dst.Range(f"A3:M{end_row}").PasteSpecial(Paste=xl_paste_formats)
-                app_dst.CutCopyMode = False  # 清除剪贴板
+                # AutoFill单次COM调用填充格式，不经过剪贴板
+                rng_dst("A3:M3").AutoFill(
+                    Destination=rng_dst(f"A3:M{end_row}"),
+                    Type=win32.constants.xlFillFormats)
             except Exception:
-                # 格式复制失败时，尝试清除填充色（兜底）
                 try:
-                    rng = ws_dst.Range(f"A3:M{end_row}")
+                    # AutoFill在合并单元格上可能失败，退回Copy(Destination=...)整体直拷
+                    # （值随后会被批量写入覆盖，同样不动剪贴板）
+                    rng_dst("A3:M3").Copy(rng_dst(f"A4:M{end_row}"))
+                except Exception:
+                    # 仍失败则只清除填充色（兜底）
                     try:
-                        rng.Interior.Pattern = pattern_none
+                        interior = rng_dst(f"A3:M{end_row}").Interior
+                        try:
+                            interior.Pattern = win32.constants.xlPatternNone
+                        except Exception:
+                            interior.ColorIndex = win32.constants.xlColorIndexNone
                     except Exception:
-                        rng.Interior.ColorIndex = color_index_none
-                except Exception:
-                    pass
-
-            # 批量写入数据（提高效率）
-            ws_dst.Range(f"A{start_row}:A{end_row}").Value = [[r[0]] for r in rows]  # A列
-            ws_dst.Range(f"D{start_row}:D{end_row}").Value = [[r[1]] for r in rows]  # D列
-            ws_dst.Range(f"E{start_row}:E{end_row}").Value = [[r[2]] for r in rows]  # E列
-            ws_dst.Range(f"F{start_row}:F{end_row}").Value = [[r[3]] for r in rows]  # F列
-            if remark_col:  # 写入备注列
-                ws_dst.Range(f"M{start_row}:M{end_row}").Value = [[r[4]] for r in rows]
-
-            # L列标注“Ⅰ”（有数据的行）
-            done = 0
-            for i in range(total_rows):
-                a_val, d_val, e_val, f_val, _ = rows[i]
-                # 只要有一个字段有值，就标注“Ⅰ”
-                if any(v not in (None, "", " ") for v in (a_val, d_val, e_val, f_val)):
-                    ws_dst.Cells(start_row + i, 12).Value = "Ⅰ"  # L列是第12列
-                done += 1
-                # 更新进度条
-                if (done % 100 == 0) or (done == total_rows):
-                    progress_bar(done, total_rows, prefix="写入")
-
-            # 扩展命名区域（方便后续打印/处理）
-            try:
-                name_candidates = {"数据区", "明细区", "DataRange", "DataArea", "数据范围"}
-                nm = None
-                for n in list(workbook_server.Names):  # 遍历工作簿中的命名区域
-                    n_name = getattr(n, "NameLocal", None) or getattr(n, "Name", "")
-                    if any(cand in n_name for cand in name_candidates):
-                        nm = n; break
-                if nm is not None:
-                    ws_name = ws_dst.Name
-                    nm.RefersTo = f"={ws_name}!$A$3:$M${end_row}"  # 更新区域范围
-            except Exception:
-                pass
+                        pass
+
+        # 在Python侧用推导式一次构造A:M数据块（含L列“Ⅰ”标注）
+        # 元组行直接按最终形状生成，免去[None]*13预分配和逐格回填赋值
+        matrix: Tuple[tuple, ...] = tuple(
+            (a_val, None, None, d_val, e_val, f_val,
+             None, None, None, None, None,
+             # 只要有一个字段有值，就在L列标注“Ⅰ”（第12列）
+             "Ⅰ" if any(v not in (None, "", " ") for v in (a_val, d_val, e_val, f_val)) else None,
+             m_val if remark_col else None)  # M列（备注）
+            for (a_val, d_val, e_val, f_val, m_val) in rows
+        )
+
+        # 批量写入数据（锚点+Resize定位，整块一次COM调用，替代逐列/逐格写入）
+        # Value2跳过货币/日期Variant转换；元组元组可直接封送为SAFEARRAY
+        _block(ws_dst, start_row, 1, total_rows, 13).Value2 = matrix
+        progress_bar(total_rows, total_rows, prefix="写入")
+
+        # 扩展命名区域（方便后续打印/处理）
+        try:
+            name_candidates = {"数据区", "明细区", "DataRange", "DataArea", "数据范围"}
+            nm = None
+            for n in list(workbook_server.Names):  # 遍历工作簿中的命名区域
+                n_name = getattr(n, "NameLocal", None) or getattr(n, "Name", "")
+                if any(cand in n_name for cand in name_candidates):
+                    nm = n; break
+            if nm is not None:
+                ws_name = ws_dst.Name
+                nm.RefersTo = f"={ws_name}!$A$3:$M${end_row}"  # 更新区域范围
+        except Exception:
+            pass
 
-        print_step("『数据信息』已填完（静默写入，保存/打印不弹窗，备注也同步）。")
+    print_step("『数据信息』已填完（静默写入，保存/打印不弹窗，备注也同步）。")
 
-    finally:
-        wb_src.Close(SaveChanges=False)  # 关闭源数据工作簿，不保存
 
 
 # ------------------- 从“数据.xlsx”识别多日期行段（按 F 列日期标记） -------------------
-def parse_day_ranges_from_source(data_excel_path: Path,
+def parse_day_ranges_from_source(source: Optional[dict],
                                  year_hint: Optional[int]) -> List[Tuple[datetime, List[Tuple[int, int]]]]:     # noqa
     """
-    从数据Excel的F列识别日期标记，拆分不同日期对应的行段
-    :param data_excel_path: 数据Excel路径
+    从缓存数据的F列识别日期标记，拆分不同日期对应的行段
+    :param source: load_source_data 返回的缓存数据字典
     :param year_hint: 年份提示（用于补全日期）
     :return: 按日期排序的列表，每个元素为(日期, 行段列表)
     """
-    if not data_excel_path.exists():
+    if not source:
         return []
-    excel_app = win32.Dispatch("Excel.Application")
-    workbook = excel_app.Workbooks.Open(str(data_excel_path), ReadOnly=True)
-    go_up = -4162  # 向上查找
-    try:
-        sheet = workbook.Sheets(1)
-        # 获取F列最后一行有数据的行号
-        last_row = sheet.Cells(sheet.Rows.Count, 6).End(go_up).Row
-        if last_row < 2:
-            return []
-        # 匹配日期格式（如“3.31”“4/4”“4月4日”）
-        pattern = re.compile(r"(\d{1,2})\s*[./月]\s*(\d{1,2})")
-        markers: List[Tuple[int, int, int]] = []  # (行号, 月, 日)
-        for r in range(2, last_row + 1):
-            val = sheet.Cells(r, 6).Value  # F列值
-            if val is None:
-                continue
-            txt = str(val).strip().replace("．", ".").replace("。", ".")  # 替换全角符号
-            m: Optional[ReMatch[str]] = pattern.search(txt)
-            if m is not None:
-                month, day = int(m.group(1)), int(m.group(2))
-                markers.append((r, month, day))
-        if not markers:  # 未找到日期标记
-            return []
-
-        # 按日期标记拆分行段
-        prev_row = 1
-        ranges_per_day: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
-        for row, month, day in markers:
-            ranges_per_day.append(((month, day), (prev_row + 1, row)))
-            prev_row = row
-        # 按日期分组行段
-        day_to_ranges: dict = {}
-        for (month, day), (start_row, end_row) in ranges_per_day:
-            day_to_ranges.setdefault((month, day), []).append((start_row, end_row))
-
-        # 补全年份并转换为datetime
-        if year_hint is None:
-            year_hint = datetime.now().year
-        out: List[Tuple[datetime, List[Tuple[int, int]]]] = []
-        for (month, day), ranges in day_to_ranges.items():
+    rows_src = source["rows"]
+    last_row = source["last_row"]
+    if last_row < 2:
+        return []
+    # 单趟扫描：识别日期标记的同时直接按(月,日)归并行段（省去中间列表）
+    # 全角句点的归一已并入_DAY_MARK_RE字符类，循环里不再做逐行replace
+    day_to_ranges: defaultdict = defaultdict(list)
+    prev_row = 1
+    search = _DAY_MARK_RE.search  # 绑定方法提出循环
+    for r, row in enumerate(rows_src[1:last_row], start=2):
+        val = row[5]  # F列值
+        if val is None:
+            continue
+        if isinstance(val, datetime):  # openpyxl把日期型单元格给成datetime，直接取月日
+            month, day = val.month, val.day
+        elif isinstance(val, (int, float)) and val >= 1000:
+            # COM的Value2把日期型单元格给成Excel序列数（如45751.0），显式换算月日；
+            # 正则匹配序列数字符串会得到假标记（“45751.0”→(51,0)），连带吞掉整段行
             try:
-                dt = datetime(year_hint, month, day)
-                out.append((dt, ranges))
-            except ValueError:  # 无效日期（如2月30日）
+                d = _EXCEL_EPOCH + timedelta(days=int(val))
+            except OverflowError:  # 不是合法序列数：跳过且不消费行段
                 continue
-        out.sort(key=lambda x: x[0])  # 按日期排序
-        return out
-    finally:
-        workbook.Close(SaveChanges=False)
+            month, day = d.month, d.day
+        else:  # 文本标记（“3.31”“4/4”“4月4日”）及纯数字标记（3.31）走正则
+            m: Optional[ReMatch[str]] = search(val if isinstance(val, str) else str(val))
+            if m is None:
+                continue
+            month, day = int(m.group(1)), int(m.group(2))
+        day_to_ranges[(month, day)].append((prev_row + 1, r))
+        prev_row = r
+    if not day_to_ranges:  # 未找到日期标记
+        return []
+
+    # 补全年份并转换为datetime
+    if year_hint is None:
+        year_hint = datetime.now().year
+    out: List[Tuple[datetime, List[Tuple[int, int]]]] = []
+    for (month, day), ranges in day_to_ranges.items():
+        try:
+            dt = datetime(year_hint, month, day)
+            out.append((dt, ranges))
+        except ValueError:  # 无效日期（如2月30日）
+            continue
+    out.sort(key=lambda x: x[0])  # 按日期排序
+    return out
 
 
 # ------------------- 主入口 -------------------
+def _warm_excel_gencache() -> None:
+    """
+    后台预热Excel COM：提前触发gencache的makepy代理生成/导入和Excel进程连接
+    COM代理不跨线程复用（STA约束），这里用完即弃——预热后主线程的EnsureDispatch
+    直接命中已导入的代理模块，省掉冷启动的几百毫秒
+    """
+    pythoncom.CoInitialize()
+    try:
+        win32.gencache.EnsureDispatch("Excel.Application")
+    except Exception:
+        pass  # 预热失败不影响主流程，主线程会照常Dispatch
+    finally:
+        pythoncom.CoUninitialize()
+
+
 def main():
     """程序主入口：引导用户输入路径，解析数据，填充Excel模板"""
-    # 1) 获取Word文件路径（默认路径+用户输入）
+    # 0) 启动COM预热线程：与路径输入/Word解析并行，掩盖首次Dispatch的冷启动开销
+    warm_thread = threading.Thread(target=_warm_excel_gencache, name="excel-warm", daemon=True)
+    warm_thread.start()
+
+    # 1) 获取Word文件路径（默认路径+用户输入），解析为绝对路径（只stat一次，后续不再校验）
     default_word = Path(r"D:\eg.docx")
-    word_file = prompt_path_with_retry("📄 Word 路径", default_word, must_exist=True, allowed_suffixes={".docx"})
+    word_file = prompt_path_with_retry("📄 Word 路径", default_word, must_exist=True,
+                                       allowed_suffixes={".docx"}).resolve()
 
     # 2) 获取外部数据Excel路径（默认桌面+Word文件名+“数据”）
     desktop = get_desktop_path()
@@ -836,31 +1126,38 @@ def main():
     data_excel_path = prompt_path_with_retry("📊 外部“数据”Excel 路径",
                                              default_data_excel,
                                              must_exist=True,
-                                             allowed_suffixes={".xlsx", ".xls"})
+                                             allowed_suffixes={".xlsx", ".xls"}).resolve()
 
-    # 3) 解析Word文档，提取关键信息
-    data_from_word = extract_data_from_word(word_file)
-    # 获取年份提示（从Word提取的日期中获取）
+    # 3) 解析Word文档，提取关键信息（提取完成后冻结为只读视图，后续各天共享同一份）
+    data_from_word = MappingProxyType(extract_data_from_word(word_file))
+    # 探伤日期只解析一次，年份提示和单日期场景共用
+    date_from_word = parse_cn_date(data_from_word.get("探伤日期") or "")
     start_date, _ = parse_cn_date_range(data_from_word.get("_原始探伤日期串", ""))
-    base_year = (start_date or parse_cn_date(data_from_word.get("探伤日期") or "") or datetime.now()).year
+    base_year = (start_date or date_from_word or datetime.now()).year
 
-    # 4) 从数据Excel中识别多日期行段
-    day_groups = parse_day_ranges_from_source(data_excel_path, base_year)
+    # 4) 一次性读取数据Excel并缓存，再从缓存中识别多日期行段
+    # .xls要走COM读取通道，同样先等预热线程收尾（并发跑makepy会写坏gen_py缓存）
+    if data_excel_path.suffix.lower() == ".xls":
+        warm_thread.join()
+    source_data = load_source_data(data_excel_path)
+    day_groups = parse_day_ranges_from_source(source_data, base_year)
 
     # 5) 连接Excel应用，处理单日期/多日期场景
-    excel_app = win32.Dispatch("Excel.Application")
+    warm_thread.join()  # 等预热收尾（通常早已结束），避免与makepy生成撞车
+    excel_app = win32.gencache.EnsureDispatch("Excel.Application")  # 早绑定：代理模块已被预热线程导入
 
     # 单日期场景
     if not day_groups:
         workbook_server = wait_active_workbook(excel_app, "❗没检测到活动工作簿，请先在 Excel 服务器里打开模板并激活")
         # 自动选择探头
-        probes_today = choose_probes_for_segments(data_excel_path, None)
-        # 填充基础信息和数据信息
-        fill_sheet_basic(workbook_server, data_from_word,
-                         override_date=parse_cn_date(data_from_word.get("探伤日期") or ""),
-                         override_probes=probes_today)
-        fill_sheet_data(workbook_server, data_excel_path, row_ranges=None)
-        print("✅ 完成：单日期填报。回到 Excel 点『打印』即可。")
+        probes_today = choose_probes_for_segments(source_data, None)
+        # 填充基础信息和数据信息（整个填报过程只挂起/恢复一次重算与刷新）
+        with excel_quiet(excel_app):
+            fill_sheet_basic(workbook_server, data_from_word,
+                             override_date=date_from_word,
+                             override_probes=probes_today)
+            fill_sheet_data(workbook_server, source_data, row_ranges=None)
+        log.info("✅ 完成：单日期填报。回到 Excel 点『打印』即可。")
         return
 
     # 多日期场景：逐天处理
@@ -868,9 +1165,38 @@ def main():
     print_step(f"总共 {total_days} 天，按日期升序逐天填报。")
     progress_bar(0, total_days, prefix="整体进度")
 
+    # 行段组合→选型结果缓存：source_data不可哈希没法直接lru_cache，在这里手工按键去重
+    # （多天共用同一测试设置时行段可能重复，重复组合直接复用结果）
+    probes_cache: dict = {}
+
+    def probes_for(day_ranges: List[Tuple[int, int]]) -> List[str]:
+        key = tuple(day_ranges)
+        got = probes_cache.get(key)
+        if got is None:
+            got = choose_probes_for_segments(source_data, day_ranges)
+            probes_cache[key] = got
+        return got
+
+    # 生产者-消费者：生产者线程按天序预计算纯Python部分（探头选型+拷贝行收集），
+    # 有界队列兜住内存（最多囤两天）；COM写入全部留在主线程（STA约束）。
+    # 这样等用户建模板、等Excel写盘的时间都在掩盖下一天的解析开销
+    day_queue: queue.Queue = queue.Queue(maxsize=2)
+
+    def produce_days() -> None:
+        try:
+            for _dt, day_ranges in day_groups:
+                day_queue.put((probes_for(day_ranges),
+                               _gather_copy_rows(source_data, _merge_ranges(day_ranges))))
+        except Exception as exc:
+            # 异常入队传回主线程重抛：否则消费者会在get()上无声挂死
+            day_queue.put(exc)
+
+    threading.Thread(target=produce_days, name="day-producer", daemon=True).start()
+
     for idx, (dt, ranges) in enumerate(day_groups, 1):
         if idx == 1:  # 第一天：初始化
-            print(f"\n▶ 开始填写第 {idx}/{total_days} 天：{format_cn_date(dt)}")
+            print()  # 换行断开未完成的进度条
+            log.info(f"▶ 开始填写第 {idx}/{total_days} 天：{format_cn_date(dt)}")
             workbook_server = wait_active_workbook(excel_app, "❗请先在 Excel 服务器里打开模板并激活")
         else:  # 后续天数：提示用户新建模板
             user = input(f"\n⏸ 第 {idx-1} 天已填完。请『新建下一张模板』并激活，然后按回车继续（输入 q 退出）：").strip().lower()
@@ -878,22 +1204,37 @@ def main():
                 print("👋 已退出。"); sys.exit(0)
             workbook_server = wait_active_workbook(excel_app, "❗仍未检测到活动工作簿，请激活模板")
 
-        # 按当天行段选择探头
-        probes_today = choose_probes_for_segments(data_excel_path, ranges)
-        # 填充当天的基础信息和数据信息
-        fill_sheet_basic(workbook_server, data_from_word,
-                         override_date=dt,
-                         override_probes=probes_today)
-        fill_sheet_data(workbook_server, data_excel_path, row_ranges=ranges)
-
-        print(f"✅ 已填写：{format_cn_date(dt)}")
+        # 取当天的预处理结果（与day_groups同序出队，生产者在用户操作期间通常已备好）
+        item = day_queue.get()
+        if isinstance(item, Exception):  # 生产者线程出错，按原始异常在主线程报出来
+            raise item
+        probes_today, prepared = item
+        # 填充当天的基础信息和数据信息（当天两张表共用一次挂起/恢复，期间不重算不重绘）
+        with excel_quiet(excel_app):
+            fill_sheet_basic(workbook_server, data_from_word,
+                             override_date=dt,
+                             override_probes=probes_today)
+            fill_sheet_data(workbook_server, source_data, row_ranges=ranges,
+                            prepared=prepared)
+
+        log.info(f"✅ 已填写：{format_cn_date(dt)}")
         progress_bar(idx, total_days, prefix="整体进度")
-        # 提示下一天操作
+        # 提示下一天操作（生产者线程此时已在后台准备下一天的数据）
         if idx < total_days:
             next_dt = day_groups[idx][0]
-            print(f"👉 下一天：{format_cn_date(next_dt)}（先在 Excel 里创建下一张，再回来按回车）")
+            log.info(f"👉 下一天：{format_cn_date(next_dt)}（先在 Excel 里创建下一张，再回来按回车）")
+
+        # 释放当天的COM代理：CDispatch靠引用计数回收，长跑时主动断引用+GC+归还COM库，
+        # 避免跨进程句柄随天数累积拖慢Excel；CutCopyMode顺带释放剪贴板持有的区域
+        workbook_server = None
+        try:
+            excel_app.CutCopyMode = False
+        except Exception:
+            pass
+        gc.collect()
+        pythoncom.CoFreeUnusedLibraries()
 
-    print("\n🎉 全部日期都填完了。回到 Excel 按『打印』出报告吧。")
+    log.info("🎉 全部日期都填完了。回到 Excel 按『打印』出报告吧。")
 
 
 if __name__ == "__main__":